@@ -6,27 +6,23 @@ Follows MCP best practices from https://modelcontextprotocol.io/
 """
 
 import asyncio
+import functools
+import itertools
 import json
+import shutil
 import sys
 import os
 import logging
-from typing import Dict, List, Any, Optional
+import logging.handlers
+import queue
+import re
+import stat
+from typing import Dict, List, Any, Callable, Optional, Set, Tuple
 from enum import Enum
 from dataclasses import dataclass, field
 import aiohttp
 from aiohttp import web
 
-# Set up logging to stderr to avoid interfering with stdio
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('mcp_server_v2.log'),
-        logging.StreamHandler(sys.stderr)
-    ]
-)
-logger = logging.getLogger("unified-mcp-v2")
-
 # Load environment variables
 try:
     from dotenv import load_dotenv
@@ -34,6 +30,59 @@ try:
 except ImportError:
     pass
 
+logger = logging.getLogger("unified-mcp-v2")
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Log to stderr (never stdout, which carries stdio traffic) and mcp_server_v2.log
+
+    Records are only enqueued on the event loop; the returned listener's
+    thread does the file/stderr writes. An unknown LOG_LEVEL falls back to INFO.
+    """
+    level_name = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    level = logging.getLevelName(level_name)
+    known = isinstance(level, int)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue,
+        logging.FileHandler('mcp_server_v2.log'),
+        logging.StreamHandler(sys.stderr),
+    )
+    listener.start()
+    logging.basicConfig(
+        level=level if known else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+    if not known:
+        logger.warning("Unknown LOG_LEVEL %r, using INFO", level_name)
+    return listener
+
+# Use orjson for JSON-RPC framing when available, falling back to the stdlib
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+
+    def _dumps_text(obj: Any) -> str:
+        """Pretty-print obj (2-space indent) for human-readable tool output"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+    _loads = json.loads
+
+    def _dumps_text(obj: Any) -> str:
+        """Pretty-print obj (2-space indent) for human-readable tool output"""
+        return json.dumps(obj, indent=2)
+
+# Run on uvloop when installed; its libuv transports cut per-I/O overhead on
+# the stdio, subprocess pipe and HTTP paths (not available on Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # JSON-RPC Error Codes (MCP Standard)
 class JsonRpcError(Enum):
     PARSE_ERROR = -32700
@@ -43,7 +92,207 @@ class JsonRpcError(Enum):
     INTERNAL_ERROR = -32603
     SERVER_ERROR = -32000  # to -32099 for server-specific errors
 
-@dataclass
+# Error codes hoisted out of the enum for the per-request error paths
+_ERR_PARSE = JsonRpcError.PARSE_ERROR.value
+_ERR_INVALID = JsonRpcError.INVALID_REQUEST.value
+_ERR_METHOD = JsonRpcError.METHOD_NOT_FOUND.value
+_ERR_INTERNAL = JsonRpcError.INTERNAL_ERROR.value
+
+# Static error responses that never carry a request id
+_PARSE_ERROR_DICT = {
+    "jsonrpc": "2.0",
+    "id": None,
+    "error": {"code": _ERR_PARSE, "message": "Parse error"}
+}
+_INVALID_REQUEST_DICT = {
+    "jsonrpc": "2.0",
+    "id": None,
+    "error": {"code": _ERR_INVALID, "message": "Invalid Request"}
+}
+_PARSE_ERROR_LINE = _dumps(_PARSE_ERROR_DICT) + b"\n"
+_INVALID_REQUEST_LINE = _dumps(_INVALID_REQUEST_DICT) + b"\n"
+
+# Pre-encoded request lines for proxied calls; only the id and params vary
+_PROXY_REQUEST_TEMPLATES = {
+    "tools/call": b'{"jsonrpc":"2.0","id":%d,"method":"tools/call","params":%b}\n',
+    "resources/read": b'{"jsonrpc":"2.0","id":%d,"method":"resources/read","params":%b}\n',
+    "prompts/get": b'{"jsonrpc":"2.0","id":%d,"method":"prompts/get","params":%b}\n',
+}
+
+def _tool_call_template(name: str) -> bytes:
+    """Pre-encode a tools/call request line for one tool; only id and arguments vary"""
+    return (b'{"jsonrpc":"2.0","id":%d,"method":"tools/call","params":{"name":'
+            + _dumps(name).replace(b"%", b"%%") + b',"arguments":%b}}\n')
+
+# Bytes a JSON document can start with; anything else is a parse error
+_JSON_VALUE_START = frozenset(b'{["-0123456789tfn')
+
+# Largest single JSON-RPC line accepted on stdio or from a proxied server
+# (asyncio defaults to 64 KiB, which large tool results easily exceed)
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+# Top-level "id" of a reply, looked for at either end of an over-limit line
+# (encoders differ in whether id comes before or after the result)
+_HEAD_ID = re.compile(rb'^\s*\{\s*(?:"jsonrpc"\s*:\s*"2\.0"\s*,\s*)?"id"\s*:\s*(\d+)')
+_TAIL_ID = re.compile(rb'"id"\s*:\s*(\d+)\s*\}\s*$')
+
+# Events buffered per SSE client before further broadcasts to it are dropped
+_SSE_QUEUE_SIZE = 256
+
+def _sse_frame(event: bytes, payload: bytes) -> bytes:
+    """Build a complete server-sent event from an encoded name and JSON payload"""
+    return b"event: " + event + b"\ndata: " + payload + b"\n\n"
+
+# HTTP transport tuning: compress /rpc bodies from this size up (the client's
+# Accept-Encoding decides the coding), and allow a deeper accept queue than
+# aiohttp's default of 128 for bursts of new connections
+_HTTP_COMPRESS_MIN_BYTES = 1024
+_HTTP_BACKLOG = 2048
+
+_SSE_CONNECTED = _sse_frame(b"connected", b'{"status": "connected"}')
+_SSE_KEEPALIVE = b": keep-alive\n\n"
+_SSE_KEEPALIVE_INTERVAL = 30.0  # seconds
+
+def _frame(rid: Any, result_bytes: bytes) -> bytes:
+    """Wrap an already-encoded result in a JSON-RPC response envelope"""
+    return b'{"jsonrpc":"2.0","id":%b,"result":%b}' % (_dumps(rid), result_bytes)
+
+def _frame_err(rid: Any, code: int, message: str) -> bytes:
+    """Build an encoded JSON-RPC error response"""
+    return b'{"jsonrpc":"2.0","id":%b,"error":{"code":%d,"message":%b}}' % (
+        _dumps(rid), code, _dumps(message)
+    )
+
+async def _discard_line(stream: asyncio.StreamReader, consumed: int) -> Tuple[bytes, bytes]:
+    """Skip the rest of a line that overran the stream limit
+
+    Returns the line's first and last bytes, which is enough to find its id.
+    """
+    head = tail = await stream.readexactly(consumed)
+    while True:
+        try:
+            chunk = await stream.readuntil(b"\n")
+        except asyncio.LimitOverrunError as e:
+            chunk = await stream.readexactly(e.consumed)
+        except asyncio.IncompleteReadError as e:
+            return head[:128], (tail + e.partial)[-128:]
+        else:
+            return head[:128], (tail[-128:] + chunk)[-128:]
+        tail = chunk
+
+def _oversized_reply_id(head: bytes, tail: bytes) -> Optional[int]:
+    """Top-level id of a discarded reply, or None when neither end shows it"""
+    match = _HEAD_ID.match(head) or _TAIL_ID.search(tail)
+    return int(match.group(1)) if match else None
+
+def _is_stream_file(f) -> bool:
+    """True if f is a pipe or socket
+
+    uvloop aborts the whole process, rather than raising, when a pipe
+    transport is given a regular file or a non-tty device such as /dev/null.
+    """
+    try:
+        mode = os.fstat(f.fileno()).st_mode
+    except (OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+@functools.lru_cache(maxsize=None)
+def _resolve_command(command: str, path: Optional[str]) -> str:
+    """Locate a server executable once per (command, PATH) pair
+
+    Reconnects reuse the resolved path, and PATHEXT lookup lets bare names
+    such as "npx" find their .cmd shims on Windows. Unresolvable commands
+    are returned unchanged so the spawn reports them as before.
+    """
+    return shutil.which(command, path=path) or command
+
+def _text_result(text: str) -> Dict[str, Any]:
+    """Wrap plain text as a tools/call result"""
+    return {"content": [{"type": "text", "text": text}]}
+
+def _expire_future(future: asyncio.Future) -> None:
+    """Timer callback failing a still-pending server request with TimeoutError"""
+    if not future.done():
+        future.set_exception(asyncio.TimeoutError())
+
+# Input schema shared by every built-in tool that takes no arguments.
+# A plain dict rather than a MappingProxyType so the JSON encoders accept it;
+# nothing mutates tool definitions after load.
+_EMPTY_SCHEMA = {"type": "object", "properties": {}, "required": []}
+
+# Built-in capabilities, shared by every server instance and copied into
+# the aggregate lists whenever the configuration is (re)loaded
+_BUILTIN_TOOLS = (
+    {
+        "name": "health_check",
+        "description": "Check health of unified MCP server",
+        "inputSchema": _EMPTY_SCHEMA
+    },
+    {
+        "name": "list_connected_servers",
+        "description": "List all connected MCP servers and their status",
+        "inputSchema": _EMPTY_SCHEMA
+    },
+    {
+        "name": "server_capabilities",
+        "description": "Get capabilities of a specific server",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "server_name": {
+                    "type": "string",
+                    "description": "Name of the server to query"
+                }
+            },
+            "required": ["server_name"]
+        }
+    },
+    {
+        "name": "server_statistics",
+        "description": "Get comprehensive performance statistics for all servers",
+        "inputSchema": _EMPTY_SCHEMA
+    },
+    {
+        "name": "reconnect_server",
+        "description": "Manually reconnect to a specific server",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "server_name": {
+                    "type": "string",
+                    "description": "Name of the server to reconnect"
+                }
+            },
+            "required": ["server_name"]
+        }
+    }
+)
+
+_BUILTIN_RESOURCES = (
+    {
+        "uri": "config://mcp-servers",
+        "name": "MCP Server Configuration",
+        "description": "Current MCP server configuration",
+        "mimeType": "application/json"
+    },
+)
+
+_BUILTIN_PROMPTS = (
+    {
+        "name": "analyze_error",
+        "description": "Analyze an error message and suggest fixes",
+        "arguments": [
+            {
+                "name": "error_message",
+                "description": "The error message to analyze",
+                "required": True
+            }
+        ]
+    },
+)
+
+@dataclass(slots=True)
 class ServerConnection:
     """Manages a persistent connection to an MCP server with health monitoring"""
     name: str
@@ -55,9 +304,16 @@ class ServerConnection:
     tools: List[Dict[str, Any]] = field(default_factory=list)
     resources: List[Dict[str, Any]] = field(default_factory=list)
     prompts: List[Dict[str, Any]] = field(default_factory=list)
-    request_id: int = 0
+    tool_names: Set[str] = field(default_factory=set)
+    tool_call_templates: Dict[str, bytes] = field(default_factory=dict)
+    resource_uris: Set[str] = field(default_factory=set)
+    prompt_names: Set[str] = field(default_factory=set)
+    next_id: Callable[[], int] = field(default_factory=lambda: itertools.count(1).__next__)
     pending_requests: Dict[int, asyncio.Future] = field(default_factory=dict)
     reader_task: Optional[asyncio.Task] = None
+    out_queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    writer_task: Optional[asyncio.Task] = None
+    timeout: float = 30.0  # seconds to wait for a proxied response
 
     # Performance and health monitoring
     last_heartbeat: float = 0.0
@@ -90,7 +346,60 @@ class ServerConnection:
         else:
             self.avg_response_time = 0.9 * self.avg_response_time + 0.1 * response_time
 
-        self.last_heartbeat = time.time()
+        # Only a completed exchange counts as a heartbeat
+        if success:
+            self.last_heartbeat = time.time()
+
+    def cancel_tasks(self):
+        """Stop the reader and writer tasks attached to the process pipes"""
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.writer_task:
+            self.writer_task.cancel()
+
+    def mark_unhealthy(self, reason: str):
+        """Flag the connection so the health monitor reconnects it"""
+        self.last_error = reason
+        self.last_heartbeat = 0.0
+
+    def fail_pending(self, reason: str):
+        """Fail every request still waiting on a response that can no longer arrive"""
+        for future in self.pending_requests.values():
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+        self.pending_requests.clear()
+
+class BlockingStdinReader:
+    """Fallback stdin reader that blocks in the default executor"""
+
+    __slots__ = ("stream",)
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    async def readuntil(self, separator: bytes = b"\n") -> bytes:
+        """StreamReader.readuntil semantics: an unterminated tail raises IncompleteReadError"""
+        line = await asyncio.get_running_loop().run_in_executor(None, self.stream.readline)
+        if not line.endswith(separator):
+            raise asyncio.IncompleteReadError(line, None)
+        return line
+
+class BlockingStdoutWriter:
+    """Fallback stdout writer for consoles, regular files and Windows pipes"""
+
+    __slots__ = ("stream",)
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data: bytes):
+        self.stream.write(data)
+
+    async def drain(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
 
 class TransportType(Enum):
     STDIO = "stdio"
@@ -99,6 +408,17 @@ class TransportType(Enum):
 class MCPServerV2:
     """Fully compliant Unified MCP Server with connection pooling and multiple transports."""
 
+    __slots__ = (
+        "transport", "server_info", "initialized", "client_info", "protocol_version",
+        "server_connections", "reconnect_locks", "mcp_servers",
+        "tools", "resources", "prompts", "tool_index", "prompt_index",
+        "_tools_cache", "_resources_cache", "_prompts_cache",
+        "_initialize_cache", "_config_resource_cache", "_health_tpl",
+        "sse_clients", "sse_keepalive_task",
+        "request_handlers", "notification_handlers", "builtin_tools",
+        "_warm_task", "health_check_task", "health_check_interval",
+    )
+
     def __init__(self, transport: TransportType = TransportType.STDIO):
         self.transport = transport
         self.server_info = {
@@ -111,14 +431,58 @@ class MCPServerV2:
 
         # Connection pool for proxy servers
         self.server_connections: Dict[str, ServerConnection] = {}
+        # One lock per server name, so only one reconnect of a server runs at a time
+        self.reconnect_locks: Dict[str, asyncio.Lock] = {}
 
         # Aggregate capabilities
         self.tools: List[Dict[str, Any]] = []
         self.resources: List[Dict[str, Any]] = []
         self.prompts: List[Dict[str, Any]] = []
 
+        # Prefixed tool/prompt name -> owning connection, for O(1) proxy routing
+        self.tool_index: Dict[str, ServerConnection] = {}
+        self.prompt_index: Dict[str, ServerConnection] = {}
+
+        # Encoded list results, rebuilt lazily after capabilities change
+        self._tools_cache: Optional[bytes] = None
+        self._resources_cache: Optional[bytes] = None
+        self._prompts_cache: Optional[bytes] = None
+        self._initialize_cache: Optional[bytes] = None
+        self._config_resource_cache: Optional[bytes] = None
+
+        # health_check text with only the counters left to fill in
+        self._health_tpl: Optional[str] = None
+
         # HTTP/SSE specific
-        self.sse_clients: List[web.StreamResponse] = []
+        # One bounded outbox per SSE stream, keyed by id() of its response
+        self.sse_clients: Dict[int, asyncio.Queue] = {}
+        self.sse_keepalive_task: Optional[asyncio.Task] = None
+
+        # JSON-RPC method routing; notifications never produce a response
+        self.request_handlers: Dict[str, Callable] = {
+            "initialize": self.handle_initialize,
+            "tools/list": self.handle_tools_list,
+            "tools/call": self.handle_tools_call,
+            "resources/list": self.handle_resources_list,
+            "resources/read": self.handle_resources_read,
+            "prompts/list": self.handle_prompts_list,
+            "prompts/get": self.handle_prompts_get,
+        }
+        self.notification_handlers: Dict[str, Callable] = {
+            "notifications/initialized": self.handle_initialized,
+        }
+
+        # Built-in tools by name, checked before proxied tools
+        self.builtin_tools: Dict[str, Callable] = {
+            "health_check": self.tool_health_check,
+            "list_connected_servers": self.tool_list_connected_servers,
+            "server_capabilities": self.tool_server_capabilities,
+            "server_statistics": self.tool_server_statistics,
+            "reconnect_server": self.tool_reconnect_server,
+        }
+
+        # Background proxy start-up, begun by warm() before the client handshake
+        self._warm_task: Optional[asyncio.Task] = None
 
         # Health monitoring
         self.health_check_task: Optional[asyncio.Task] = None
@@ -129,100 +493,23 @@ class MCPServerV2:
 
     def load_mcp_config(self):
         """Load MCP server configurations from .mcp.json"""
+        self._config_resource_cache = None
         try:
-            with open('.mcp.json', 'r') as f:
-                config = json.load(f)
+            with open('.mcp.json', 'rb') as f:
+                config = _loads(f.read())
 
             self.mcp_servers = config.get('mcpServers', {})
 
-            # Add built-in tools
-            self.tools = [
-                {
-                    "name": "health_check",
-                    "description": "Check health of unified MCP server",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                },
-                {
-                    "name": "list_connected_servers",
-                    "description": "List all connected MCP servers and their status",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                },
-                {
-                    "name": "server_capabilities",
-                    "description": "Get capabilities of a specific server",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "server_name": {
-                                "type": "string",
-                                "description": "Name of the server to query"
-                            }
-                        },
-                        "required": ["server_name"]
-                    }
-                },
-                {
-                    "name": "server_statistics",
-                    "description": "Get comprehensive performance statistics for all servers",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                },
-                {
-                    "name": "reconnect_server",
-                    "description": "Manually reconnect to a specific server",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "server_name": {
-                                "type": "string",
-                                "description": "Name of the server to reconnect"
-                            }
-                        },
-                        "required": ["server_name"]
-                    }
-                }
-            ]
-
-            # Add example resources
-            self.resources = [
-                {
-                    "uri": "config://mcp-servers",
-                    "name": "MCP Server Configuration",
-                    "description": "Current MCP server configuration",
-                    "mimeType": "application/json"
-                }
-            ]
-
-            # Add example prompts
-            self.prompts = [
-                {
-                    "name": "analyze_error",
-                    "description": "Analyze an error message and suggest fixes",
-                    "arguments": [
-                        {
-                            "name": "error_message",
-                            "description": "The error message to analyze",
-                            "required": True
-                        }
-                    ]
-                }
-            ]
+            # Built-in tools, resources and prompts
+            self.tools = list(_BUILTIN_TOOLS)
+            self.resources = list(_BUILTIN_RESOURCES)
+            self.prompts = list(_BUILTIN_PROMPTS)
 
-            logger.info(f"Loaded configuration with {len(self.mcp_servers)} servers")
+            self.invalidate_capability_cache()
+            logger.info("Loaded configuration with %s servers", len(self.mcp_servers))
 
         except Exception as e:
-            logger.error(f"Failed to load MCP config: {e}")
+            logger.error("Failed to load MCP config: %s", e)
             self.mcp_servers = {}
 
     async def start_server_connection(self, server_name: str, server_config: Dict[str, Any]) -> ServerConnection:
@@ -239,7 +526,7 @@ class MCPServerV2:
                 # Validate configuration
                 command = server_config.get('command')
                 if not command:
-                    logger.error(f"No command specified for server {server_name}")
+                    logger.error("No command specified for server %s", server_name)
                     return None
 
                 args = server_config.get('args', [])
@@ -252,7 +539,8 @@ class MCPServerV2:
                         env_var = arg[5:]
                         expanded_value = env.get(env_var)
                         if not expanded_value:
-                            logger.warning(f"Environment variable {env_var} not set for {server_name}")
+                            logger.warning("Environment variable %s not set for %s",
+                                           env_var, server_name)
                             expanded_args.append(arg)  # Keep original if not found
                         else:
                             expanded_args.append(expanded_value)
@@ -261,12 +549,14 @@ class MCPServerV2:
 
                 conn = ServerConnection(
                     name=server_name,
-                    command=[command] + expanded_args,
+                    command=[_resolve_command(command, env.get("PATH"))] + expanded_args,
                     env=env
                 )
 
-                logger.info(f"Starting server {server_name} (attempt {attempt + 1}/{max_retries})")
-                logger.debug(f"Command: {command} {' '.join(expanded_args)}")
+                logger.info("Starting server %s (attempt %s/%s)",
+                            server_name, attempt + 1, max_retries)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Command: %s %s", command, ' '.join(expanded_args))
 
                 # Start the process with timeout
                 conn.process = await asyncio.wait_for(
@@ -275,19 +565,20 @@ class MCPServerV2:
                         stdin=asyncio.subprocess.PIPE,
                         stdout=asyncio.subprocess.PIPE,
                         stderr=asyncio.subprocess.PIPE,
-                        env=conn.env
+                        env=conn.env,
+                        limit=_STREAM_LIMIT
                     ),
                     timeout=10.0
                 )
 
-                # Start reader task
+                # Start reader and batching writer tasks
                 conn.reader_task = asyncio.create_task(self.read_server_output(conn))
+                conn.writer_task = asyncio.create_task(self.write_server_input(conn))
 
                 # Initialize the server
-                conn.request_id += 1
                 init_request = {
                     "jsonrpc": "2.0",
-                    "id": conn.request_id,
+                    "id": conn.next_id(),
                     "method": "initialize",
                     "params": {
                         "protocolVersion": "2024-11-05",
@@ -319,32 +610,40 @@ class MCPServerV2:
                     # Fetch tools, resources, and prompts
                     await self.fetch_server_capabilities(conn)
 
-                    logger.info(f"Successfully connected to {server_name} with {len(conn.tools)} tools")
+                    logger.info("Successfully connected to %s with %s tools",
+                                server_name, len(conn.tools))
                     return conn
                 else:
-                    logger.error(f"Failed to initialize {server_name}: Invalid response")
+                    logger.error("Failed to initialize %s: Invalid response", server_name)
                     if conn.process:
                         conn.process.terminate()
 
                     if attempt < max_retries - 1:
-                        logger.info(f"Retrying connection to {server_name} in {retry_delay}s...")
+                        logger.info("Retrying connection to %s in %ss...", server_name, retry_delay)
                         await asyncio.sleep(retry_delay)
                         retry_delay *= 2  # Exponential backoff
                         continue
                     return None
 
+            except asyncio.CancelledError:
+                # Shutting down mid start-up: the child is in no connection
+                # table yet, so nothing else would ever stop it
+                if 'conn' in locals():
+                    await self.close_connection(conn)
+                raise
             except asyncio.TimeoutError:
-                logger.error(f"Timeout connecting to {server_name} (attempt {attempt + 1})")
+                logger.error("Timeout connecting to %s (attempt %s)", server_name, attempt + 1)
                 if 'conn' in locals() and conn.process:
                     conn.process.terminate()
             except FileNotFoundError:
-                logger.error(f"Command not found for {server_name}: {command}")
+                logger.error("Command not found for %s: %s", server_name, command)
                 return None  # Don't retry for missing commands
             except PermissionError:
-                logger.error(f"Permission denied for {server_name}: {command}")
+                logger.error("Permission denied for %s: %s", server_name, command)
                 return None  # Don't retry for permission issues
             except Exception as e:
-                logger.error(f"Failed to start server {server_name} (attempt {attempt + 1}): {e}")
+                logger.error("Failed to start server %s (attempt %s): %s",
+                             server_name, attempt + 1, e)
                 if 'conn' in locals() and conn.process:
                     try:
                         conn.process.terminate()
@@ -352,63 +651,121 @@ class MCPServerV2:
                         pass
 
             if attempt < max_retries - 1:
-                logger.info(f"Retrying connection to {server_name} in {retry_delay}s...")
+                logger.info("Retrying connection to %s in %ss...", server_name, retry_delay)
                 await asyncio.sleep(retry_delay)
                 retry_delay *= 2  # Exponential backoff
 
-        logger.error(f"Failed to connect to {server_name} after {max_retries} attempts")
+        logger.error("Failed to connect to %s after %s attempts", server_name, max_retries)
         return None
 
     async def read_server_output(self, conn: ServerConnection):
         """Read output from a server process"""
         try:
-            while conn.process and not conn.process.stdout.at_eof():
-                line = await conn.process.stdout.readline()
-                if not line:
-                    break
-
+            stdout = conn.process.stdout
+            while not stdout.at_eof():
                 try:
-                    message = json.loads(line.decode())
+                    line = await stdout.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    # EOF: handle a final unterminated message, if any
+                    line = e.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError as e:
+                    # Skip to the end of the line, then answer the request it
+                    # replied to now rather than after its timeout
+                    head, tail = await _discard_line(stdout, e.consumed)
+                    rid = _oversized_reply_id(head, tail)
+                    if rid is None and len(conn.pending_requests) == 1:
+                        rid = next(iter(conn.pending_requests))
+                    logger.error("Dropping oversized message from %s (id %s)", conn.name, rid)
+                    future = conn.pending_requests.pop(rid, None)
+                    if future is not None and not future.done():
+                        future.set_result({"jsonrpc": "2.0", "id": rid, "error": {
+                            "code": _ERR_INTERNAL,
+                            "message": f"Response exceeds {_STREAM_LIMIT} byte limit"
+                        }})
+                    continue
 
-                    # Handle responses to our requests
-                    if "id" in message and message["id"] in conn.pending_requests:
-                        future = conn.pending_requests.pop(message["id"])
-                        if not future.cancelled():
+                try:
+                    message = _loads(line)
+
+                    # Handle responses to our requests with a single pending lookup;
+                    # the future may already have failed on its timeout timer
+                    rid = message.get("id")
+                    if rid is not None:
+                        future = conn.pending_requests.pop(rid, None)
+                        if future is not None and not future.done():
                             future.set_result(message)
 
                     # Handle notifications from server
-                    elif "method" in message and "id" not in message:
+                    elif "method" in message:
                         await self.handle_server_notification(conn, message)
 
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON from {conn.name}: {line}")
+                except (json.JSONDecodeError, AttributeError, TypeError):
+                    # Undecodable, or valid JSON that is not a message object
+                    logger.error("Invalid JSON from %s: %s", conn.name, line)
 
         except Exception as e:
-            logger.error(f"Error reading from {conn.name}: {e}")
+            logger.error("Error reading from %s: %s", conn.name, e)
+        finally:
+            # Nothing more can be answered once stdout closes
+            if conn.writer_task:
+                conn.writer_task.cancel()
+
+    async def write_server_input(self, conn: ServerConnection):
+        """Drain queued messages to a server, coalescing bursts into one write and drain"""
+        queue = conn.out_queue
+        try:
+            while True:
+                batch = [await queue.get()]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                conn.process.stdin.write(b"".join(batch))
+                await conn.process.stdin.drain()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Error writing to %s: %s", conn.name, e)
+            conn.mark_unhealthy(str(e))
+            conn.fail_pending(f"Write to {conn.name} failed: {e}")
 
     async def send_server_request(self, conn: ServerConnection, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Send a request to a server and wait for response with performance monitoring"""
+        return await self.send_server_payload(conn, request.get("id"), _dumps(request) + b"\n")
+
+    async def send_server_payload(self, conn: ServerConnection, request_id: Optional[int],
+                                  payload: bytes,
+                                  raise_timeout: bool = False) -> Optional[Dict[str, Any]]:
+        """Send an encoded request line to a server and wait for the response carrying request_id"""
         if not conn.process or conn.process.returncode is not None:
             return None
 
+        # Once the writer has stopped, nothing queued would ever be sent
+        if conn.writer_task is not None and conn.writer_task.done():
+            logger.error("Error sending request to %s: writer stopped", conn.name)
+            return None
+
         import time
         start_time = time.time()
         success = False
+        timer = None
 
         try:
-            # Create future for response
-            request_id = request.get("id")
+            # Create future for response, failed by a plain loop timer rather
+            # than a wait_for wrapper if the server never answers
             if request_id:
-                future = asyncio.Future()
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
                 conn.pending_requests[request_id] = future
+                timer = loop.call_later(conn.timeout, _expire_future, future)
 
-            # Send request
-            conn.process.stdin.write((json.dumps(request) + "\n").encode())
-            await conn.process.stdin.drain()
+            # Queue request for the connection's writer task
+            conn.out_queue.put_nowait(payload)
 
             # Wait for response if it's a request (not a notification)
             if request_id:
-                response = await asyncio.wait_for(future, timeout=30.0)
+                response = await future
                 success = True
                 return response
 
@@ -416,16 +773,20 @@ class MCPServerV2:
             return None
 
         except asyncio.TimeoutError:
-            logger.error(f"Request timeout for {conn.name}")
-            conn.last_error = "Request timeout"
-            if request_id in conn.pending_requests:
-                conn.pending_requests.pop(request_id)
+            logger.error("Request timeout for %s", conn.name)
+            conn.mark_unhealthy("Request timeout")
+            if raise_timeout:
+                raise
             return None
         except Exception as e:
-            logger.error(f"Error sending request to {conn.name}: {e}")
+            logger.error("Error sending request to %s: %s", conn.name, e)
             conn.last_error = str(e)
             return None
         finally:
+            if timer:
+                timer.cancel()
+                # Drop the slot on timeout or caller cancellation too
+                conn.pending_requests.pop(request_id, None)
             # Update performance statistics
             response_time = time.time() - start_time
             conn.update_stats(response_time, success)
@@ -436,75 +797,133 @@ class MCPServerV2:
             return
 
         try:
-            conn.process.stdin.write((json.dumps(notification) + "\n").encode())
-            await conn.process.stdin.drain()
+            conn.out_queue.put_nowait(_dumps(notification) + b"\n")
         except Exception as e:
-            logger.error(f"Error sending notification to {conn.name}: {e}")
+            logger.error("Error sending notification to %s: %s", conn.name, e)
+
+    async def proxy_request(self, conn: ServerConnection, method: str,
+                            params: Dict[str, Any]) -> Dict[str, Any]:
+        """Forward a request to a connected server and return its result
+
+        Bounded by the connection timeout.
+        """
+        request_id = conn.next_id()
+        payload = _PROXY_REQUEST_TEMPLATES[method] % (request_id, _dumps(params))
+        return await self.proxy_payload(conn, request_id, payload)
+
+    async def proxy_payload(self, conn: ServerConnection, request_id: int,
+                            payload: bytes) -> Dict[str, Any]:
+        """Send a pre-encoded request line carrying request_id and return its result"""
+        try:
+            response = await self.send_server_payload(conn, request_id, payload, raise_timeout=True)
+        except asyncio.TimeoutError:
+            raise Exception(f"Timeout waiting for {conn.name} after {conn.timeout}s")
+
+        if response and "result" in response:
+            return response["result"]
+        elif response and "error" in response:
+            raise Exception(f"Server error: {response['error'].get('message', 'Unknown error')}")
+        else:
+            raise Exception(f"No response from {conn.name}")
 
     async def handle_server_notification(self, conn: ServerConnection, notification: Dict[str, Any]):
         """Handle notifications from connected servers"""
         method = notification.get("method")
-        logger.info(f"Notification from {conn.name}: {method}")
+        logger.debug("Notification from %s: %s", conn.name, method)
 
     async def fetch_server_capabilities(self, conn: ServerConnection):
         """Fetch tools, resources, and prompts from a connected server"""
         try:
-            # Fetch tools
-            conn.request_id += 1
-            tools_response = await self.send_server_request(conn, {
-                "jsonrpc": "2.0",
-                "id": conn.request_id,
-                "method": "tools/list",
-                "params": {}
-            })
+            # Allocate ids up front so the three list requests can be in flight together
+            tools_id, resources_id, prompts_id = conn.next_id(), conn.next_id(), conn.next_id()
 
-            if tools_response and "result" in tools_response:
+            tools_response, resources_response, prompts_response = await asyncio.gather(
+                self.send_server_request(conn, {
+                    "jsonrpc": "2.0",
+                    "id": tools_id,
+                    "method": "tools/list",
+                    "params": {}
+                }),
+                self.send_server_request(conn, {
+                    "jsonrpc": "2.0",
+                    "id": resources_id,
+                    "method": "resources/list",
+                    "params": {}
+                }),
+                self.send_server_request(conn, {
+                    "jsonrpc": "2.0",
+                    "id": prompts_id,
+                    "method": "prompts/list",
+                    "params": {}
+                }),
+                return_exceptions=True
+            )
+
+            if isinstance(tools_response, dict) and "result" in tools_response:
                 tools = tools_response["result"].get("tools", [])
-                # Prefix tool names with server name to avoid conflicts
+                # Prefix tool names with server name to avoid conflicts, and
+                # pre-encode each tool's call envelope under its original name
+                templates = {}
                 for tool in tools:
-                    tool["name"] = f"{conn.name}_{tool['name']}"
+                    prefixed = f"{conn.name}_{tool['name']}"
+                    templates[prefixed] = _tool_call_template(tool["name"])
+                    tool["name"] = prefixed
                     tool["description"] = f"[{conn.name}] {tool.get('description', '')}"
                 conn.tools = tools
+                conn.tool_names = {t["name"] for t in tools}
+                conn.tool_call_templates = templates
                 self.tools.extend(tools)
+                for tool in tools:
+                    self.tool_index[tool["name"]] = conn
 
-            # Fetch resources
-            conn.request_id += 1
-            resources_response = await self.send_server_request(conn, {
-                "jsonrpc": "2.0",
-                "id": conn.request_id,
-                "method": "resources/list",
-                "params": {}
-            })
-
-            if resources_response and "result" in resources_response:
+            if isinstance(resources_response, dict) and "result" in resources_response:
                 resources = resources_response["result"].get("resources", [])
                 # Prefix resource URIs with server name
                 for resource in resources:
                     resource["uri"] = f"{conn.name}://{resource.get('uri', '')}"
                     resource["name"] = f"[{conn.name}] {resource.get('name', '')}"
                 conn.resources = resources
+                conn.resource_uris = {r["uri"] for r in resources}
                 self.resources.extend(resources)
 
-            # Fetch prompts
-            conn.request_id += 1
-            prompts_response = await self.send_server_request(conn, {
-                "jsonrpc": "2.0",
-                "id": conn.request_id,
-                "method": "prompts/list",
-                "params": {}
-            })
-
-            if prompts_response and "result" in prompts_response:
+            if isinstance(prompts_response, dict) and "result" in prompts_response:
                 prompts = prompts_response["result"].get("prompts", [])
                 # Prefix prompt names with server name
                 for prompt in prompts:
                     prompt["name"] = f"{conn.name}_{prompt['name']}"
                     prompt["description"] = f"[{conn.name}] {prompt.get('description', '')}"
                 conn.prompts = prompts
+                conn.prompt_names = {p["name"] for p in prompts}
                 self.prompts.extend(prompts)
+                for prompt in prompts:
+                    self.prompt_index[prompt["name"]] = conn
+
+            self.invalidate_capability_cache()
 
         except Exception as e:
-            logger.error(f"Error fetching capabilities from {conn.name}: {e}")
+            logger.error("Error fetching capabilities from %s: %s", conn.name, e)
+
+    def invalidate_capability_cache(self):
+        """Forget encoded list results after tools, resources or prompts change"""
+        self._tools_cache = None
+        self._resources_cache = None
+        self._prompts_cache = None
+
+    def remove_server_capabilities(self, conn: ServerConnection):
+        """Drop a connection's tools, resources and prompts from the aggregate lists and indexes"""
+        if conn.tool_names:
+            self.tools = [t for t in self.tools if t["name"] not in conn.tool_names]
+            for name in conn.tool_names:
+                if self.tool_index.get(name) is conn:
+                    del self.tool_index[name]
+        if conn.resource_uris:
+            self.resources = [r for r in self.resources if r["uri"] not in conn.resource_uris]
+        if conn.prompt_names:
+            self.prompts = [p for p in self.prompts if p["name"] not in conn.prompt_names]
+            for name in conn.prompt_names:
+                if self.prompt_index.get(name) is conn:
+                    del self.prompt_index[name]
+        self.invalidate_capability_cache()
 
     async def initialize_proxy_servers(self):
         """Initialize connections to all configured MCP servers"""
@@ -525,57 +944,89 @@ class MCPServerV2:
                 if isinstance(conn, ServerConnection) and conn:
                     self.server_connections[conn.name] = conn
                 elif isinstance(conn, Exception):
-                    logger.error(f"Server connection failed: {conn}")
+                    logger.error("Server connection failed: %s", conn)
 
-            logger.info(f"Connected to {len(self.server_connections)} servers")
+            logger.info("Connected to %s servers", len(self.server_connections))
         except Exception as e:
-            logger.error(f"Error during proxy server initialization: {e}")
+            logger.error("Error during proxy server initialization: %s", e)
 
         # Start health monitoring
         if not self.health_check_task:
             self.health_check_task = asyncio.create_task(self.health_monitor_loop())
 
-    async def handle_initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def warm(self) -> asyncio.Task:
+        """Start connecting to proxy servers in the background, at most once"""
+        if self._warm_task is None:
+            self._warm_task = asyncio.create_task(self.initialize_proxy_servers())
+            logger.info("Started proxy server initialization task")
+        return self._warm_task
+
+    async def handle_initialize(self, params: Dict[str, Any]) -> bytes:
         """Handle MCP initialize request"""
-        logger.info(f"Initialize request: {params}")
+        logger.debug("Initialize request: %s", params)
 
         self.protocol_version = params.get("protocolVersion")
         self.client_info = params.get("clientInfo", {})
 
-        # Build basic capabilities (will be updated after proxy servers connect)
-        capabilities = {
-            "tools": {},
-            "resources": {},
-            "prompts": {},
-            "logging": {}
-        }
+        # The result never varies per client, so encode it once
+        if self._initialize_cache is None:
+            capabilities = {
+                "tools": {},
+                "resources": {},
+                "prompts": {},
+                "logging": {}
+            }
 
-        return {
-            "protocolVersion": "2024-11-05",
-            "capabilities": capabilities,
-            "serverInfo": self.server_info
-        }
+            self._initialize_cache = _dumps({
+                "protocolVersion": "2024-11-05",
+                "capabilities": capabilities,
+                "serverInfo": self.server_info
+            })
+        return self._initialize_cache
 
     async def handle_initialized(self, _params: Dict[str, Any]) -> None:
         """Handle initialized notification from client"""
         logger.info("Client initialized notification received")
         self.initialized = True
-        logger.info(f"Server initialized flag set to: {self.initialized}")
+        logger.info("Server initialized flag set to: %s", self.initialized)
 
-        # Now that client is ready, initialize proxy connections in background
-        # Use proper error handling to prevent exceptions from leaking
+        # Proxy connections are normally already warming from main(); start
+        # them here for embedders that never called warm()
         try:
-            task = asyncio.create_task(self.initialize_proxy_servers())
-            logger.info("Started proxy server initialization task")
+            self.warm()
         except Exception as e:
-            logger.error(f"Error starting proxy server initialization: {e}")
+            logger.error("Error starting proxy server initialization: %s", e)
 
-    async def handle_tools_list(self, _params: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_tools_list(self, _params: Dict[str, Any]) -> bytes:
         """Handle tools/list request"""
         if not self.initialized:
             raise Exception("Server not initialized")
 
-        return {"tools": self.tools}
+        if self._tools_cache is None:
+            self._tools_cache = _dumps({"tools": self.tools})
+        return self._tools_cache
+
+    def health_text(self) -> str:
+        """Render the health_check report from a template built once per server"""
+        if self._health_tpl is None:
+            # Same layout json.dumps(..., indent=2) produced; initialized is
+            # always true by the time tools can be called
+            self._health_tpl = (
+                '{\n'
+                '  "status": "healthy",\n'
+                '  "version": %s,\n'
+                '  "connected_servers": %%d,\n'
+                '  "total_tools": %%d,\n'
+                '  "total_resources": %%d,\n'
+                '  "total_prompts": %%d,\n'
+                '  "initialized": true,\n'
+                '  "transport": %s\n'
+                '}'
+            ) % (json.dumps(self.server_info["version"]).replace("%", "%%"),
+                 json.dumps(self.transport.value).replace("%", "%%"))
+
+        return self._health_tpl % (len(self.server_connections), len(self.tools),
+                                   len(self.resources), len(self.prompts))
 
     async def handle_tools_call(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle tools/call request"""
@@ -585,220 +1036,120 @@ class MCPServerV2:
         tool_name = params.get("name")
         arguments = params.get("arguments", {})
 
-        logger.info(f"Tool call: {tool_name} with args: {arguments}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Tool call: %s with args: %s", tool_name, arguments)
 
         # Handle built-in tools
-        if tool_name == "health_check":
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": json.dumps({
-                            "status": "healthy",
-                            "version": self.server_info["version"],
-                            "connected_servers": len(self.server_connections),
-                            "total_tools": len(self.tools),
-                            "total_resources": len(self.resources),
-                            "total_prompts": len(self.prompts),
-                            "initialized": self.initialized,
-                            "transport": self.transport.value
-                        }, indent=2)
-                    }
-                ]
-            }
-
-        elif tool_name == "list_connected_servers":
-            servers_info = {}
-            for name, conn in self.server_connections.items():
-                servers_info[name] = {
-                    "connected": conn.process is not None and conn.process.returncode is None,
-                    "initialized": conn.initialized,
-                    "tools_count": len(conn.tools),
-                    "resources_count": len(conn.resources),
-                    "prompts_count": len(conn.prompts)
-                }
+        tool = self.builtin_tools.get(tool_name)
+        if tool:
+            return await tool(arguments)
 
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": json.dumps(servers_info, indent=2)
-                    }
-                ]
-            }
+        # Proxy to appropriate server
+        conn = self.tool_index.get(tool_name)
+        if conn:
+            request_id = conn.next_id()
+            payload = conn.tool_call_templates[tool_name] % (request_id, _dumps(arguments))
+            return await self.proxy_payload(conn, request_id, payload)
 
-        elif tool_name == "server_capabilities":
-            server_name = arguments.get("server_name")
-            if server_name not in self.server_connections:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"Server '{server_name}' not found or not connected"
-                        }
-                    ]
-                }
+        raise Exception(f"Tool not found: {tool_name}")
 
-            conn = self.server_connections[server_name]
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": json.dumps({
-                            "capabilities": conn.capabilities,
-                            "tools": [t["name"] for t in conn.tools],
-                            "resources": [r["uri"] for r in conn.resources],
-                            "prompts": [p["name"] for p in conn.prompts]
-                        }, indent=2)
-                    }
-                ]
-            }
+    async def tool_health_check(self, _arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Built-in tool: overall health of the unified server"""
+        return _text_result(self.health_text())
 
-        elif tool_name == "server_statistics":
-            stats = await self.get_server_stats()
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": json.dumps(stats, indent=2)
-                    }
-                ]
+    async def tool_list_connected_servers(self, _arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Built-in tool: connection status of every proxied server"""
+        servers_info = {}
+        for name, conn in self.server_connections.items():
+            servers_info[name] = {
+                "connected": conn.process is not None and conn.process.returncode is None,
+                "initialized": conn.initialized,
+                "tools_count": len(conn.tools),
+                "resources_count": len(conn.resources),
+                "prompts_count": len(conn.prompts)
             }
 
-        elif tool_name == "reconnect_server":
-            server_name = arguments.get("server_name")
-            if not server_name:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Error: server_name is required"
-                        }
-                    ]
-                }
+        return _text_result(_dumps_text(servers_info))
 
-            if server_name not in self.mcp_servers:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"Error: Server '{server_name}' not found in configuration"
-                        }
-                    ]
-                }
+    async def tool_server_capabilities(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Built-in tool: capabilities advertised by one proxied server"""
+        server_name = arguments.get("server_name")
+        conn = self.server_connections.get(server_name)
+        if not conn:
+            return _text_result(f"Server '{server_name}' not found or not connected")
 
-            # Clean up existing connection
-            if server_name in self.server_connections:
-                old_conn = self.server_connections[server_name]
-                if old_conn.reader_task:
-                    old_conn.reader_task.cancel()
-                if old_conn.process:
-                    old_conn.process.terminate()
-
-            # Attempt reconnection
-            server_config = self.mcp_servers[server_name]
-            new_conn = await self.start_server_connection(server_name, server_config)
+        return _text_result(_dumps_text({
+            "capabilities": conn.capabilities,
+            "tools": [t["name"] for t in conn.tools],
+            "resources": [r["uri"] for r in conn.resources],
+            "prompts": [p["name"] for p in conn.prompts]
+        }))
 
-            if new_conn:
-                self.server_connections[server_name] = new_conn
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"Successfully reconnected to {server_name}"
-                        }
-                    ]
-                }
-            else:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"Failed to reconnect to {server_name}"
-                        }
-                    ]
-                }
+    async def tool_server_statistics(self, _arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Built-in tool: performance statistics for all servers"""
+        return _text_result(_dumps_text(await self.get_server_stats()))
 
-        # Proxy to appropriate server
-        for server_name, conn in self.server_connections.items():
-            if any(tool["name"] == tool_name for tool in conn.tools):
-                # Found the tool, proxy the request
-                conn.request_id += 1
-                response = await self.send_server_request(conn, {
-                    "jsonrpc": "2.0",
-                    "id": conn.request_id,
-                    "method": "tools/call",
-                    "params": {
-                        "name": tool_name.replace(f"{server_name}_", ""),  # Remove prefix
-                        "arguments": arguments
-                    }
-                })
+    async def tool_reconnect_server(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Built-in tool: restart the connection to one configured server"""
+        server_name = arguments.get("server_name")
+        if not server_name:
+            return _text_result("Error: server_name is required")
 
-                if response and "result" in response:
-                    return response["result"]
-                elif response and "error" in response:
-                    raise Exception(f"Server error: {response['error'].get('message', 'Unknown error')}")
-                else:
-                    raise Exception(f"No response from {server_name}")
+        if server_name not in self.mcp_servers:
+            return _text_result(f"Error: Server '{server_name}' not found in configuration")
 
-        raise Exception(f"Tool not found: {tool_name}")
+        if await self.reconnect(server_name):
+            return _text_result(f"Successfully reconnected to {server_name}")
+        return _text_result(f"Failed to reconnect to {server_name}")
 
-    async def handle_resources_list(self, _params: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_resources_list(self, _params: Dict[str, Any]) -> bytes:
         """Handle resources/list request"""
         if not self.initialized:
             raise Exception("Server not initialized")
 
-        return {"resources": self.resources}
+        if self._resources_cache is None:
+            self._resources_cache = _dumps({"resources": self.resources})
+        return self._resources_cache
 
-    async def handle_resources_read(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_resources_read(self, params: Dict[str, Any]) -> Any:
         """Handle resources/read request"""
         if not self.initialized:
             raise Exception("Server not initialized")
 
         uri = params.get("uri")
 
-        # Handle built-in resources
+        # Handle built-in resources; the configuration only changes on reload
         if uri == "config://mcp-servers":
-            return {
-                "contents": [
-                    {
-                        "uri": uri,
-                        "mimeType": "application/json",
-                        "text": json.dumps(self.mcp_servers, indent=2)
-                    }
-                ]
-            }
-
-        # Proxy to appropriate server
-        for server_name, conn in self.server_connections.items():
-            if uri.startswith(f"{server_name}://"):
-                # Remove server prefix from URI
-                original_uri = uri.replace(f"{server_name}://", "")
-
-                conn.request_id += 1
-                response = await self.send_server_request(conn, {
-                    "jsonrpc": "2.0",
-                    "id": conn.request_id,
-                    "method": "resources/read",
-                    "params": {"uri": original_uri}
+            if self._config_resource_cache is None:
+                self._config_resource_cache = _dumps({
+                    "contents": [
+                        {
+                            "uri": uri,
+                            "mimeType": "application/json",
+                            "text": _dumps_text(self.mcp_servers)
+                        }
+                    ]
                 })
+            return self._config_resource_cache
 
-                if response and "result" in response:
-                    return response["result"]
-                elif response and "error" in response:
-                    raise Exception(f"Server error: {response['error'].get('message', 'Unknown error')}")
-                else:
-                    raise Exception(f"No response from {server_name}")
+        # Proxy to appropriate server, keyed by the server-name scheme prefix
+        server_name, sep, original_uri = uri.partition("://")
+        conn = self.server_connections.get(server_name) if sep else None
+        if conn:
+            return await self.proxy_request(conn, "resources/read", {"uri": original_uri})
 
         raise Exception(f"Resource not found: {uri}")
 
-    async def handle_prompts_list(self, _params: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_prompts_list(self, _params: Dict[str, Any]) -> bytes:
         """Handle prompts/list request"""
-        logger.info(f"Prompts list requested. Initialized: {self.initialized}, Prompts count: {len(self.prompts)}")
+        logger.debug("Prompts list requested. Initialized: %s, Prompts count: %s",
+                     self.initialized, len(self.prompts))
         if not self.initialized:
             raise Exception("Server not initialized")
 
-        return {"prompts": self.prompts}
+        if self._prompts_cache is None:
+            self._prompts_cache = _dumps({"prompts": self.prompts})
+        return self._prompts_cache
 
     async def handle_prompts_get(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle prompts/get request"""
@@ -824,176 +1175,175 @@ class MCPServerV2:
             }
 
         # Proxy to appropriate server
-        for server_name, conn in self.server_connections.items():
-            if any(prompt["name"] == name for prompt in conn.prompts):
-                conn.request_id += 1
-                response = await self.send_server_request(conn, {
-                    "jsonrpc": "2.0",
-                    "id": conn.request_id,
-                    "method": "prompts/get",
-                    "params": {
-                        "name": name.replace(f"{server_name}_", ""),  # Remove prefix
-                        "arguments": arguments
-                    }
-                })
-
-                if response and "result" in response:
-                    return response["result"]
-                elif response and "error" in response:
-                    raise Exception(f"Server error: {response['error'].get('message', 'Unknown error')}")
-                else:
-                    raise Exception(f"No response from {server_name}")
+        conn = self.prompt_index.get(name)
+        if conn:
+            return await self.proxy_request(conn, "prompts/get", {
+                "name": name[len(conn.name) + 1:],  # Remove prefix
+                "arguments": arguments
+            })
 
         raise Exception(f"Prompt not found: {name}")
 
-    async def handle_request(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Handle incoming MCP request"""
+    async def handle_request(self, request: Dict[str, Any]) -> Optional[bytes]:
+        """Handle incoming MCP request and return the encoded JSON-RPC response
+
+        Handlers may return a dict or an already-encoded result (bytes); either way
+        the response envelope is framed around the encoded result without building
+        an intermediate response dict.
+        """
         method = request.get("method")
         params = request.get("params", {})
         request_id = request.get("id")
 
-        logger.info(f"Handling request: {method}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Handling request: %s", method)
 
         try:
             # Route to appropriate handler
-            if method == "initialize":
-                result = await self.handle_initialize(params)
-            elif method == "notifications/initialized":
-                logger.info(f"Processing notifications/initialized with params: {params}")
-                await self.handle_initialized(params)
-                logger.info(f"Server initialized flag is now: {self.initialized}")
+            handler = self.request_handlers.get(method)
+            if handler is None:
+                handler = self.notification_handlers.get(method)
+                if handler is None:
+                    # Method not found
+                    return _frame_err(request_id, _ERR_METHOD, f"Method not found: {method}")
+                await handler(params)
                 return None  # No response for notifications
-            elif method == "tools/list":
-                result = await self.handle_tools_list(params)
-            elif method == "tools/call":
-                result = await self.handle_tools_call(params)
-            elif method == "resources/list":
-                result = await self.handle_resources_list(params)
-            elif method == "resources/read":
-                result = await self.handle_resources_read(params)
-            elif method == "prompts/list":
-                result = await self.handle_prompts_list(params)
-            elif method == "prompts/get":
-                result = await self.handle_prompts_get(params)
-            else:
-                # Method not found
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": JsonRpcError.METHOD_NOT_FOUND.value,
-                        "message": f"Method not found: {method}"
-                    }
-                }
+
+            result = await handler(params)
 
             # Return response if it's a request (has id)
             if request_id is not None:
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": result
-                }
+                if not isinstance(result, bytes):
+                    result = _dumps(result)
+                return _frame(request_id, result)
 
             return None
 
         except Exception as e:
-            logger.error(f"Error handling request {method}: {e}")
+            logger.error("Error handling request %s: %s", method, e)
             if request_id is not None:
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": JsonRpcError.INTERNAL_ERROR.value,
-                        "message": str(e)
-                    }
-                }
+                return _frame_err(request_id, _ERR_INTERNAL, str(e))
             return None
 
+    async def open_stdin_reader(self):
+        """Attach an asyncio StreamReader to stdin so lines arrive without a thread hop"""
+        if sys.platform == "win32" or sys.stdin.isatty() or not _is_stream_file(sys.stdin):
+            return BlockingStdinReader(sys.stdin.buffer)
+
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=_STREAM_LIMIT)
+        try:
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        except (ValueError, OSError, NotImplementedError) as e:
+            logger.debug("Falling back to blocking stdin reads: %s", e)
+            return BlockingStdinReader(sys.stdin.buffer)
+
+        return reader
+
+    async def open_stdout_writer(self):
+        """Wrap stdout in an asyncio StreamWriter so responses are buffered by the transport"""
+        if sys.platform == "win32" or sys.stdout.isatty() or not _is_stream_file(sys.stdout):
+            return BlockingStdoutWriter(sys.stdout.buffer)
+
+        loop = asyncio.get_running_loop()
+        try:
+            transport, protocol = await loop.connect_write_pipe(
+                asyncio.streams.FlowControlMixin, sys.stdout
+            )
+        except (ValueError, OSError, NotImplementedError) as e:
+            logger.debug("Falling back to blocking stdout writes: %s", e)
+            return BlockingStdoutWriter(sys.stdout.buffer)
+
+        return asyncio.StreamWriter(transport, protocol, None, loop)
+
     async def run_stdio(self):
         """Run the MCP server in stdio mode"""
         logger.info("Starting Unified MCP Server v2 (stdio transport)")
 
+        reader = await self.open_stdin_reader()
+        writer = await self.open_stdout_writer()
+
         try:
             while True:
                 # Read JSON-RPC request from stdin
-                line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
-                if not line:
-                    break
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    # EOF: handle a final unterminated request, if any
+                    line = e.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError as e:
+                    # Skip the rest of the over-limit line, so it gets exactly
+                    # one parse error like any other unparseable input
+                    await _discard_line(reader, e.consumed)
+                    logger.error("Request line exceeds stream limit; discarded")
+                    writer.write(_PARSE_ERROR_LINE)
+                    await writer.drain()
+                    continue
 
                 line = line.strip()
                 if not line:
                     continue
 
+                # Cheap rejection of lines that cannot be JSON at all
+                if line[0] not in _JSON_VALUE_START:
+                    logger.debug("Invalid JSON: unexpected leading character")
+                    writer.write(_PARSE_ERROR_LINE)
+                    await writer.drain()
+                    continue
+
                 try:
-                    request = json.loads(line)
+                    request = _loads(line)
 
                     # Validate JSON-RPC request
                     if not isinstance(request, dict) or "jsonrpc" not in request:
-                        error_response = {
-                            "jsonrpc": "2.0",
-                            "id": None,
-                            "error": {
-                                "code": JsonRpcError.INVALID_REQUEST.value,
-                                "message": "Invalid Request"
-                            }
-                        }
-                        print(json.dumps(error_response), flush=True)
+                        writer.write(_INVALID_REQUEST_LINE)
+                        await writer.drain()
                         continue
 
                     response = await self.handle_request(request)
 
-                    # Send response if there is one
+                    # Send response if there is one; notifications skip the drain entirely
                     if response:
-                        print(json.dumps(response), flush=True)
+                        writer.write(response + b"\n")
+                        await writer.drain()
 
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON: {e}")
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "id": None,
-                        "error": {
-                            "code": JsonRpcError.PARSE_ERROR.value,
-                            "message": "Parse error"
-                        }
-                    }
-                    print(json.dumps(error_response), flush=True)
+                except ValueError as e:
+                    # JSONDecodeError from either decoder, or UnicodeDecodeError
+                    # when the stdlib fallback meets bytes that are not UTF-8
+                    logger.error("Invalid JSON: %s", e)
+                    writer.write(_PARSE_ERROR_LINE)
+                    await writer.drain()
 
         except KeyboardInterrupt:
             logger.info("Server stopped by user")
         except Exception as e:
-            logger.error(f"Server error: {e}")
+            logger.error("Server error: %s", e)
         finally:
+            writer.close()
             await self.cleanup()
 
     async def handle_http_request(self, request: web.Request) -> web.Response:
         """Handle HTTP POST requests for JSON-RPC"""
         try:
-            data = await request.json()
+            data = _loads(await request.read())
             response = await self.handle_request(data)
 
             if response:
-                return web.json_response(response)
+                http_response = web.Response(body=response, content_type="application/json")
+                # Large tool results shrink well; small ones are not worth the CPU
+                if len(response) >= _HTTP_COMPRESS_MIN_BYTES:
+                    http_response.enable_compression()
+                return http_response
             else:
                 return web.Response(status=204)  # No content for notifications
 
-        except json.JSONDecodeError:
-            return web.json_response({
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": JsonRpcError.PARSE_ERROR.value,
-                    "message": "Parse error"
-                }
-            }, status=400)
+        except ValueError:
+            return web.Response(body=_PARSE_ERROR_LINE, status=400, content_type="application/json")
         except Exception as e:
-            return web.json_response({
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": JsonRpcError.INTERNAL_ERROR.value,
-                    "message": str(e)
-                }
-            }, status=500)
+            return web.Response(body=_frame_err(None, _ERR_INTERNAL, str(e)), status=500,
+                                content_type="application/json")
 
     async def handle_sse_connect(self, request: web.Request) -> web.StreamResponse:
         """Handle SSE connections for server-to-client messages"""
@@ -1005,61 +1355,86 @@ class MCPServerV2:
         await response.prepare(request)
 
         # Send connection established event
-        await response.write(b'event: connected\ndata: {"status": "connected"}\n\n')
+        await response.write(_SSE_CONNECTED)
 
-        # Add to SSE clients list
-        self.sse_clients.append(response)
+        # Register an outbox; broadcasts are queued here and written by this handler
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_SSE_QUEUE_SIZE)
+        self.sse_clients[id(response)] = queue
 
         try:
-            # Keep connection alive
+            # Deliver queued events (keep-alives arrive the same way, from
+            # sse_keepalive_loop); events that piled up go out in one write
             while True:
-                await asyncio.sleep(30)
-                await response.write(b': keep-alive\n\n')
+                message = await queue.get()
+                if not queue.empty():
+                    frames = [message]
+                    while not queue.empty():
+                        frames.append(queue.get_nowait())
+                    message = b"".join(frames)
+                await response.write(message)
         except Exception:
             pass
         finally:
-            self.sse_clients.remove(response)
+            self.sse_clients.pop(id(response), None)
 
         return response
 
     async def broadcast_sse(self, event: str, data: Any):
         """Broadcast an event to all SSE clients"""
-        message = f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode()
+        # Encode once; every client queue receives the same bytes object
+        message = _sse_frame(event.encode(), _dumps(data))
 
-        for client in self.sse_clients[:]:  # Copy list to avoid modification during iteration
+        # Never wait on a slow client: drop the event for any full outbox
+        for queue in self.sse_clients.values():
             try:
-                await client.write(message)
-            except Exception:
-                self.sse_clients.remove(client)
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("SSE client queue full, dropping '%s' event", event)
+
+    async def sse_keepalive_loop(self):
+        """Queue a keep-alive comment for every idle SSE client on one shared timer"""
+        while True:
+            await asyncio.sleep(_SSE_KEEPALIVE_INTERVAL)
+            for queue in self.sse_clients.values():
+                # A client with events still pending needs no keep-alive
+                if queue.empty():
+                    queue.put_nowait(_SSE_KEEPALIVE)
 
     async def run_http(self, host: str = "0.0.0.0", port: int = 3333):
         """Run the MCP server in HTTP/SSE mode"""
-        logger.info(f"Starting Unified MCP Server v2 (HTTP/SSE transport) on {host}:{port}")
+        logger.info("Starting Unified MCP Server v2 (HTTP/SSE transport) on %s:%s", host, port)
 
         app = web.Application()
         app.router.add_post('/rpc', self.handle_http_request)
         app.router.add_get('/sse', self.handle_sse_connect)
 
-        # Add health check endpoint
-        app.router.add_get('/health', lambda _r: web.json_response({
+        # Add health check endpoint (the body never changes, so encode it once)
+        health_body = _dumps({
             "status": "healthy",
             "transport": "http_sse",
             "version": self.server_info["version"]
-        }))
+        })
+        app.router.add_get('/health', lambda _r: web.Response(
+            body=health_body, content_type="application/json"
+        ))
 
         runner = web.AppRunner(app)
         await runner.setup()
-        site = web.TCPSite(runner, host, port)
+        site = web.TCPSite(runner, host, port, backlog=_HTTP_BACKLOG)
 
         try:
             await site.start()
-            logger.info(f"HTTP server started on http://{host}:{port}")
+            logger.info("HTTP server started on http://%s:%s", host, port)
+
+            self.sse_keepalive_task = asyncio.create_task(self.sse_keepalive_loop())
 
             # Keep running
             await asyncio.Event().wait()
         except KeyboardInterrupt:
             logger.info("Server stopped by user")
         finally:
+            if self.sse_keepalive_task:
+                self.sse_keepalive_task.cancel()
             await runner.cleanup()
             await self.cleanup()
 
@@ -1072,85 +1447,111 @@ class MCPServerV2:
                 unhealthy_servers = []
                 for name, conn in self.server_connections.items():
                     if not conn.is_healthy():
-                        logger.warning(f"Server {name} is unhealthy: {conn.last_error}")
+                        logger.warning("Server %s is unhealthy: %s", name, conn.last_error)
                         unhealthy_servers.append(name)
 
-                # Attempt to reconnect unhealthy servers
-                for server_name in unhealthy_servers:
-                    logger.info(f"Attempting to reconnect to {server_name}")
-                    old_conn = self.server_connections[server_name]
-
-                    # Clean up old connection
-                    if old_conn.reader_task:
-                        old_conn.reader_task.cancel()
-                    if old_conn.process:
-                        old_conn.process.terminate()
-
-                    # Attempt reconnection
-                    server_config = self.mcp_servers.get(server_name)
-                    if server_config:
-                        new_conn = await self.start_server_connection(server_name, server_config)
-                        if new_conn:
-                            self.server_connections[server_name] = new_conn
-                            logger.info(f"Successfully reconnected to {server_name}")
-                        else:
-                            logger.error(f"Failed to reconnect to {server_name}")
+                # Reconnect unhealthy servers concurrently
+                if unhealthy_servers:
+                    await asyncio.gather(
+                        *(self.reconnect(name) for name in unhealthy_servers),
+                        return_exceptions=True
+                    )
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in health monitor: {e}")
+                logger.error("Error in health monitor: %s", e)
+
+    async def reconnect(self, server_name: str) -> Optional[ServerConnection]:
+        """Tear down a server connection and start a fresh one"""
+        server_config = self.mcp_servers.get(server_name)
+        if not server_config:
+            return None
+
+        stale_conn = self.server_connections.get(server_name)
+        lock = self.reconnect_locks.setdefault(server_name, asyncio.Lock())
+        async with lock:
+            # A reconnect that held the lock before us may already have replaced it
+            current = self.server_connections.get(server_name)
+            if current is not stale_conn and current is not None and current.is_healthy():
+                return current
+
+            logger.info("Attempting to reconnect to %s", server_name)
+
+            # Clean up existing connection
+            if current:
+                self.remove_server_capabilities(current)
+                await self.close_connection(current)
+
+            new_conn = await self.start_server_connection(server_name, server_config)
+            if not new_conn:
+                logger.error("Failed to reconnect to %s", server_name)
+                return None
+
+            self.server_connections[server_name] = new_conn
+            logger.info("Successfully reconnected to %s", server_name)
+            return new_conn
 
     async def get_server_stats(self) -> Dict[str, Any]:
         """Get comprehensive server statistics"""
-        stats = {
-            "unified_server": {
-                "version": self.server_info["version"],
-                "initialized": self.initialized,
-                "transport": self.transport.value,
-                "total_tools": len(self.tools),
-                "total_resources": len(self.resources),
-                "total_prompts": len(self.prompts)
-            },
-            "connected_servers": {},
-            "summary": {
-                "total_servers": len(self.server_connections),
-                "healthy_servers": 0,
-                "unhealthy_servers": 0,
-                "total_requests": 0,
-                "total_errors": 0
-            }
-        }
+        connected_servers = {}
+        healthy = unhealthy = total_requests = total_errors = 0
 
         for name, conn in self.server_connections.items():
             is_healthy = conn.is_healthy()
-            stats["connected_servers"][name] = {
+            rc = conn.request_count
+            ec = conn.error_count
+            connected_servers[name] = {
                 "healthy": is_healthy,
                 "initialized": conn.initialized,
                 "tools_count": len(conn.tools),
                 "resources_count": len(conn.resources),
                 "prompts_count": len(conn.prompts),
-                "request_count": conn.request_count,
-                "error_count": conn.error_count,
+                "request_count": rc,
+                "error_count": ec,
                 "avg_response_time": round(conn.avg_response_time, 3),
                 "last_error": conn.last_error,
                 "connection_attempts": conn.connection_attempts
             }
 
             if is_healthy:
-                stats["summary"]["healthy_servers"] += 1
+                healthy += 1
             else:
-                stats["summary"]["unhealthy_servers"] += 1
+                unhealthy += 1
+            total_requests += rc
+            total_errors += ec
 
-            stats["summary"]["total_requests"] += conn.request_count
-            stats["summary"]["total_errors"] += conn.error_count
-
-        return stats
+        return {
+            "unified_server": {
+                "version": self.server_info["version"],
+                "initialized": self.initialized,
+                "transport": self.transport.value,
+                "total_tools": len(self.tools),
+                "total_resources": len(self.resources),
+                "total_prompts": len(self.prompts)
+            },
+            "connected_servers": connected_servers,
+            "summary": {
+                "total_servers": len(self.server_connections),
+                "healthy_servers": healthy,
+                "unhealthy_servers": unhealthy,
+                "total_requests": total_requests,
+                "total_errors": total_errors
+            }
+        }
 
     async def cleanup(self):
         """Clean up server connections"""
         logger.info("Cleaning up server connections...")
 
+        # Stop a proxy start-up that is still in flight
+        if self._warm_task and not self._warm_task.done():
+            self._warm_task.cancel()
+            try:
+                await self._warm_task
+            except asyncio.CancelledError:
+                pass
+
         # Stop health monitoring
         if self.health_check_task:
             self.health_check_task.cancel()
@@ -1159,22 +1560,36 @@ class MCPServerV2:
             except asyncio.CancelledError:
                 pass
 
-        # Close all server connections
-        for name, conn in self.server_connections.items():
-            if conn.reader_task:
-                conn.reader_task.cancel()
-            if conn.process:
-                try:
-                    conn.process.terminate()
-                    await asyncio.wait_for(conn.process.wait(), timeout=5.0)
-                except asyncio.TimeoutError:
-                    conn.process.kill()
-                    await conn.process.wait()
-                except Exception as e:
-                    logger.error(f"Error closing {name}: {e}")
+        # Close all server connections concurrently, so shutdown waits on the
+        # slowest child rather than the sum of them
+        await asyncio.gather(
+            *(self.close_connection(conn) for conn in self.server_connections.values()),
+            return_exceptions=True
+        )
 
         self.server_connections.clear()
 
+    async def close_connection(self, conn: ServerConnection):
+        """Stop one server: fail its in-flight requests, then end and reap the process"""
+        conn.cancel_tasks()
+
+        # Wake anyone still waiting on a response that can no longer arrive
+        conn.fail_pending(f"Connection to {conn.name} closed")
+
+        if conn.process:
+            try:
+                if conn.process.stdin:
+                    conn.process.stdin.close()
+                conn.process.terminate()
+                await asyncio.wait_for(conn.process.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                conn.process.kill()
+                await conn.process.wait()
+            except ProcessLookupError:
+                pass
+            except Exception as e:
+                logger.error("Error closing %s: %s", conn.name, e)
+
 async def main():
     """Main entry point"""
     import argparse
@@ -1199,16 +1614,27 @@ async def main():
     )
 
     args = parser.parse_args()
+    log_listener = setup_logging()
 
-    # Create server with specified transport
-    transport = TransportType.STDIO if args.transport == "stdio" else TransportType.HTTP_SSE
-    server = MCPServerV2(transport=transport)
+    try:
+        # Create server with specified transport
+        transport = TransportType.STDIO if args.transport == "stdio" else TransportType.HTTP_SSE
+        server = MCPServerV2(transport=transport)
 
-    # Run server
-    if transport == TransportType.STDIO:
-        await server.run_stdio()
-    else:
-        await server.run_http(args.host, args.port)
+        # Spawn proxy servers while the client is still connecting, so their
+        # start-up overlaps the handshake instead of following it
+        server.warm()
+
+        # Run server
+        if transport == TransportType.STDIO:
+            await server.run_stdio()
+        else:
+            await server.run_http(args.host, args.port)
+    finally:
+        log_listener.stop()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
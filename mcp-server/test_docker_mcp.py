@@ -3,33 +3,49 @@
 Quick test script to verify Docker-based MCP server setup
 """
 
+import shutil
 import subprocess
 import json
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-def test_docker_container(container_name):
-    """Test if a Docker container is running and healthy"""
+# Resolve the docker CLI once instead of searching PATH on every call
+DOCKER = shutil.which('docker') or 'docker'
+
+def test_docker_containers(container_names):
+    """Test which of the given Docker containers are running, with one docker ps call"""
+    # Repeated name filters are OR-ed; each is a substring match, so report the
+    # first row whose name contains the requested one
+    cmd = [DOCKER, 'ps', '--format', '{{json .}}']
+    for name in container_names:
+        cmd += ['--filter', f'name={name}']
     try:
-        result = subprocess.run(['docker', 'ps', '--filter', f'name={container_name}', '--format', 'json'], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode == 0 and result.stdout.strip():
-            container_info = json.loads(result.stdout.strip())
-            return {
-                'status': 'running',
-                'name': container_info.get('Names', 'unknown'),
-                'image': container_info.get('Image', 'unknown'),
-                'state': container_info.get('State', 'unknown')
-            }
-        return {'status': 'not_found'}
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        rows = []
+        if result.returncode == 0:
+            rows = [json.loads(line) for line in result.stdout.splitlines() if line.strip()]
+        statuses = {}
+        for name in container_names:
+            container_info = next((row for row in rows if name in row.get('Names', '')), None)
+            if container_info is None:
+                statuses[name] = {'status': 'not_found'}
+            else:
+                statuses[name] = {
+                    'status': 'running',
+                    'name': container_info.get('Names', 'unknown'),
+                    'image': container_info.get('Image', 'unknown'),
+                    'state': container_info.get('State', 'unknown')
+                }
+        return statuses
     except Exception as e:
-        return {'status': 'error', 'error': str(e)}
+        return {name: {'status': 'error', 'error': str(e)} for name in container_names}
 
 def test_mcp_server_response(container_name):
     """Test MCP server response"""
     try:
         # Test basic Python execution
-        result = subprocess.run(['docker', 'exec', container_name, 'python', '-c', 
+        result = subprocess.run([DOCKER, 'exec', container_name, 'python', '-c', 
                                'import json; print(json.dumps({"test": "success", "timestamp": "' + str(time.time()) + '"}))'], 
                               capture_output=True, text=True, timeout=15)
         if result.returncode == 0:
@@ -43,12 +59,14 @@ def test_mcp_server_response(container_name):
 def test_docker_images():
     """Test available Docker images"""
     try:
-        result = subprocess.run(['docker', 'images', '--format', 'json'], 
+        result = subprocess.run([DOCKER, 'images', '--format', '{{json .}}'], 
                               capture_output=True, text=True, timeout=10)
         if result.returncode == 0:
             images = []
             for line in result.stdout.strip().split('\n'):
-                if line:
+                # Only parse rows that can possibly match the repository check below
+                lowered = line.lower()
+                if 'mcp' in lowered or 'unified' in lowered:
                     img = json.loads(line)
                     if 'mcp' in img.get('Repository', '').lower() or 'unified' in img.get('Repository', '').lower():
                         images.append({
@@ -82,14 +100,23 @@ def main():
         'mcp-http-final'
     ]
     
+    # One docker ps covers every container; the exec probes each wait on the
+    # daemon, so run them for all running containers at once
+    container_statuses = test_docker_containers(containers_to_test)
+    statuses = [container_statuses[container] for container in containers_to_test]
+    running = [c for c, result in zip(containers_to_test, statuses) if result['status'] == 'running']
+    responses = {}
+    if running:
+        with ThreadPoolExecutor(max_workers=len(running)) as pool:
+            responses = dict(zip(running, pool.map(test_mcp_server_response, running)))
+
     print("\n🐳 Testing Docker Containers:")
-    for container in containers_to_test:
-        result = test_docker_container(container)
+    for container, result in zip(containers_to_test, statuses):
         if result['status'] == 'running':
             print(f"  ✅ {container}: Running ({result['image']})")
             
             # Test MCP server response
-            mcp_result = test_mcp_server_response(container)
+            mcp_result = responses[container]
             if mcp_result['status'] == 'success':
                 print(f"    ✅ MCP Response: {mcp_result['response']}")
             else:
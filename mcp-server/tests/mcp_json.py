@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+JSON helpers shared by the test modules
+Uses orjson when installed; its JSONDecodeError subclasses json's, so callers
+catch json.JSONDecodeError (or ValueError) either way
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    loads = orjson.loads
+
+    def dumps_line(obj: Any) -> bytes:
+        """Encode obj as one newline-terminated JSON-RPC message"""
+        return orjson.dumps(obj) + b"\n"
+except ImportError:
+    loads = json.loads
+
+    def dumps_line(obj: Any) -> bytes:
+        """Encode obj as one newline-terminated JSON-RPC message"""
+        return (json.dumps(obj) + "\n").encode()
@@ -4,27 +4,33 @@ Comprehensive test script for the MCP Server
 Tests all functionality, security, and configuration
 """
 
-import requests
+import aiohttp
+import asyncio
 import json
 import os
-import time
 import subprocess
 from typing import Dict, Any
 import logging
 
+from mcp_json import loads as _loads
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Client name -> environment variable holding its API key
+API_KEY_VARS = {
+    "cursor": "MCP_CURSOR_API_KEY",
+    "claude": "MCP_CLAUDE_API_KEY",
+    "windsurf": "MCP_WINDSURF_API_KEY"
+}
+
 class MCPServerTester:
     def __init__(self, base_url: str = "http://localhost:3333"):
         self.base_url = base_url
-        self.api_keys = {
-            "cursor": os.getenv("MCP_CURSOR_API_KEY"),
-            "claude": os.getenv("MCP_CLAUDE_API_KEY"),
-            "windsurf": os.getenv("MCP_WINDSURF_API_KEY")
-        }
+        self.api_keys = {client: os.getenv(var) for client, var in API_KEY_VARS.items()}
         self.test_results = []
+        self.session: aiohttp.ClientSession = None
 
     def log_test(self, test_name: str, success: bool, message: str = ""):
         """Log test results."""
@@ -36,12 +42,27 @@ class MCPServerTester:
             "message": message
         })
 
-    def test_server_health(self) -> bool:
+    async def wait_for_server(self, attempts: int = 40, interval: float = 0.05) -> bool:
+        """Poll the health endpoint until it answers 200, giving up after `attempts` tries."""
+        for _ in range(attempts):
+            try:
+                async with self.session.get(f"{self.base_url}/health",
+                                            timeout=aiohttp.ClientTimeout(total=0.5)) as response:
+                    if response.status == 200:
+                        return True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(interval)
+        return False
+
+    async def test_server_health(self) -> bool:
         """Test server health endpoint."""
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
+            async with self.session.get(f"{self.base_url}/health",
+                                        timeout=aiohttp.ClientTimeout(total=5)) as response:
+                status = response.status
+                data = _loads(await response.read()) if status == 200 else None
+            if status == 200:
                 if data.get("status") == "ok":
                     self.log_test("Server Health", True, f"Version: {data.get('version')}")
                     return True
@@ -49,18 +70,20 @@ class MCPServerTester:
                     self.log_test("Server Health", False, f"Status not OK: {data}")
                     return False
             else:
-                self.log_test("Server Health", False, f"HTTP {response.status_code}")
+                self.log_test("Server Health", False, f"HTTP {status}")
                 return False
         except Exception as e:
             self.log_test("Server Health", False, f"Connection failed: {str(e)}")
             return False
 
-    def test_schema_endpoint(self) -> bool:
+    async def test_schema_endpoint(self) -> bool:
         """Test schema endpoint."""
         try:
-            response = requests.get(f"{self.base_url}/schema", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
+            async with self.session.get(f"{self.base_url}/schema",
+                                        timeout=aiohttp.ClientTimeout(total=5)) as response:
+                status = response.status
+                data = _loads(await response.read()) if status == 200 else None
+            if status == 200:
                 tools = data.get("tools", [])
                 if len(tools) > 0:
                     self.log_test("Schema Endpoint", True, f"Found {len(tools)} tools")
@@ -69,39 +92,42 @@ class MCPServerTester:
                     self.log_test("Schema Endpoint", False, "No tools found")
                     return False
             else:
-                self.log_test("Schema Endpoint", False, f"HTTP {response.status_code}")
+                self.log_test("Schema Endpoint", False, f"HTTP {status}")
                 return False
         except Exception as e:
             self.log_test("Schema Endpoint", False, f"Request failed: {str(e)}")
             return False
 
-    def test_authentication(self) -> bool:
+    async def _check_auth(self, client: str, api_key: str) -> bool:
+        """Check one client's API key against the schema endpoint."""
+        if not api_key:
+            self.log_test(f"Auth - {client}", False, "API key not found in environment")
+            return False
+
+        try:
+            headers = {"Authorization": f"Bearer {api_key}"}
+            async with self.session.get(f"{self.base_url}/schema", headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=5)) as response:
+                status = response.status
+
+            if status == 200:
+                self.log_test(f"Auth - {client}", True, "Authentication successful")
+                return True
+            else:
+                self.log_test(f"Auth - {client}", False, f"HTTP {status}")
+                return False
+        except Exception as e:
+            self.log_test(f"Auth - {client}", False, f"Request failed: {str(e)}")
+            return False
+
+    async def test_authentication(self) -> bool:
         """Test API key authentication."""
-        results = []
-        
-        for client, api_key in self.api_keys.items():
-            if not api_key:
-                self.log_test(f"Auth - {client}", False, "API key not found in environment")
-                results.append(False)
-                continue
-                
-            try:
-                headers = {"Authorization": f"Bearer {api_key}"}
-                response = requests.get(f"{self.base_url}/schema", headers=headers, timeout=5)
-                
-                if response.status_code == 200:
-                    self.log_test(f"Auth - {client}", True, "Authentication successful")
-                    results.append(True)
-                else:
-                    self.log_test(f"Auth - {client}", False, f"HTTP {response.status_code}")
-                    results.append(False)
-            except Exception as e:
-                self.log_test(f"Auth - {client}", False, f"Request failed: {str(e)}")
-                results.append(False)
-        
+        results = await asyncio.gather(
+            *(self._check_auth(client, api_key) for client, api_key in self.api_keys.items())
+        )
         return all(results)
 
-    def test_tool_invocation(self) -> bool:
+    async def test_tool_invocation(self) -> bool:
         """Test tool invocation with system_info tool."""
         api_key = self.api_keys.get("cursor") or self.api_keys.get("claude") or self.api_keys.get("windsurf")
         
@@ -120,15 +146,19 @@ class MCPServerTester:
                 "args": {}
             }
             
-            response = requests.post(
+            async with self.session.post(
                 f"{self.base_url}/invoke",
                 headers=headers,
                 json=payload,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                status = response.status
+                if status == 200:
+                    data = _loads(await response.read())
+                else:
+                    text = await response.text()
+
+            if status == 200:
                 if data.get("status") == "success":
                     self.log_test("Tool Invocation", True, "system_info tool executed successfully")
                     return True
@@ -136,14 +166,14 @@ class MCPServerTester:
                     self.log_test("Tool Invocation", False, f"Tool execution failed: {data}")
                     return False
             else:
-                self.log_test("Tool Invocation", False, f"HTTP {response.status_code}: {response.text}")
+                self.log_test("Tool Invocation", False, f"HTTP {status}: {text}")
                 return False
                 
         except Exception as e:
             self.log_test("Tool Invocation", False, f"Request failed: {str(e)}")
             return False
 
-    def test_rate_limiting(self) -> bool:
+    async def test_rate_limiting(self) -> bool:
         """Test rate limiting functionality."""
         api_key = self.api_keys.get("cursor") or self.api_keys.get("claude") or self.api_keys.get("windsurf")
         
@@ -154,12 +184,14 @@ class MCPServerTester:
         try:
             headers = {"Authorization": f"Bearer {api_key}"}
             
-            # Make rapid requests to trigger rate limiting
-            responses = []
-            for i in range(15):  # Exceed the 10 requests per second limit
-                response = requests.get(f"{self.base_url}/schema", headers=headers, timeout=2)
-                responses.append(response.status_code)
-                
+            async def probe() -> int:
+                async with self.session.get(f"{self.base_url}/schema", headers=headers,
+                                            timeout=aiohttp.ClientTimeout(total=2)) as response:
+                    return response.status
+
+            # Fire the requests together to exceed the 10 requests per second limit
+            responses = await asyncio.gather(*(probe() for _ in range(15)))
+
             # Check if we got rate limited (HTTP 429)
             rate_limited = any(status == 429 for status in responses)
             
@@ -176,17 +208,12 @@ class MCPServerTester:
 
     def test_environment_security(self) -> bool:
         """Test that environment variables are properly configured."""
-        required_vars = [
-            "MCP_CURSOR_API_KEY",
-            "MCP_CLAUDE_API_KEY", 
-            "MCP_WINDSURF_API_KEY"
-        ]
-        
         missing = []
         weak = []
         
-        for var in required_vars:
-            value = os.getenv(var)
+        # Read the keys snapshotted in __init__ rather than os.environ again
+        for client, var in API_KEY_VARS.items():
+            value = self.api_keys[client]
             if not value:
                 missing.append(var)
             elif len(value) < 32:
@@ -215,8 +242,9 @@ class MCPServerTester:
         for config_file in config_files:
             if os.path.exists(config_file):
                 try:
-                    with open(config_file, 'r') as f:
-                        json.load(f)  # This will raise an exception if JSON is invalid
+                    # This will raise an exception if JSON is invalid
+                    with open(config_file, 'rb') as f:
+                        _loads(f.read())
                     self.log_test(f"Config - {os.path.basename(config_file)}", True, "Valid JSON")
                     results.append(True)
                 except json.JSONDecodeError as e:
@@ -228,25 +256,32 @@ class MCPServerTester:
         
         return all(results)
 
-    def run_all_tests(self) -> Dict[str, Any]:
+    async def run_all_tests(self) -> Dict[str, Any]:
         """Run all tests and return results."""
         logger.info("=== Starting Comprehensive MCP Server Tests ===")
         
-        # Wait for server to be ready
-        time.sleep(2)
-        
-        tests = [
-            self.test_server_health,
-            self.test_environment_security,
-            self.test_configuration_files,
-            self.test_schema_endpoint,
-            self.test_authentication,
-            self.test_tool_invocation,
-            self.test_rate_limiting
-        ]
-        
-        for test in tests:
-            test()
+        # Local checks need no server
+        self.test_environment_security()
+        self.test_configuration_files()
+
+        # One pooled session for every request; the independent endpoint checks
+        # run concurrently, and the rate-limit burst runs alone afterwards so it
+        # cannot push the other checks into HTTP 429
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=30)
+        ) as self.session:
+            # Wait for server to be ready; without it every endpoint check
+            # would only report its own connection failure
+            if await self.wait_for_server():
+                await asyncio.gather(
+                    self.test_server_health(),
+                    self.test_schema_endpoint(),
+                    self.test_authentication(),
+                    self.test_tool_invocation()
+                )
+                await self.test_rate_limiting()
+            else:
+                self.log_test("Server Ready", False, f"No answer from {self.base_url}/health")
         
         # Summary
         passed = sum(1 for result in self.test_results if result["success"])
@@ -274,7 +309,7 @@ if __name__ == "__main__":
     load_dotenv()
     
     tester = MCPServerTester()
-    results = tester.run_all_tests()
+    results = asyncio.run(tester.run_all_tests())
     
     # Exit with appropriate code
     exit(0 if results["success_rate"] == 100 else 1)